@@ -1,12 +1,11 @@
 """Tool definitions for Elasticsearch Agent."""
 
-from typing import Optional, Any
+import asyncio
+from typing import List, Optional, Any
 from elasticsearch import Elasticsearch
 from langchain_core.tools import StructuredTool
 from rich.console import Console
-from ..storage.elasticsearch_retrieval import retrieve_from_elasticsearch
-from ..processing.context_pruning import prune_with_provence
-from ..processing.context_summarization import summarize_context
+from ..storage.elasticsearch_retrieval import retrieve_and_process
 
 
 def search_elasticsearch_memory(
@@ -17,7 +16,8 @@ def search_elasticsearch_memory(
     llm,
     provence_model: Optional[Any],
     args,
-    console: Optional[Console] = None
+    console: Optional[Console] = None,
+    precomputed_vector: Optional[List[float]] = None
 ) -> str:
     """
     Search Elasticsearch for relevant previous conversations, prune context, summarize, and return.
@@ -32,6 +32,7 @@ def search_elasticsearch_memory(
         provence_model: Provence reranker model (optional)
         args: Parsed command line arguments
         console: Rich console for output
+        precomputed_vector: Optional embedding of the query (skips embedding it again)
         
     Returns:
         A string containing relevant past conversation context (pruned and summarized)
@@ -40,44 +41,10 @@ def search_elasticsearch_memory(
         return "Elasticsearch is not available. Cannot search long-term memory."
     
     try:
-        # Retrieve context from Elasticsearch (use rank_window for candidates, return top 5)
-        retrieved_docs, context_string = retrieve_from_elasticsearch(
-            query, es_client, es_index_name, embeddings, args.rank_window,
-            k=5, verbose=args.verbose, console=console
+        result, _ = retrieve_and_process(
+            query, es_client, es_index_name, embeddings, llm, provence_model, args, console,
+            precomputed_vector
         )
-        
-        if not retrieved_docs:
-            return context_string  # This will be an error message or empty message
-        
-        # Combine all retrieved context
-        original_context = context_string
-        
-        if args.verbose and console:
-            console.print(f"\n[yellow]📦 Original retrieved context: {len(original_context)} characters[/yellow]")
-        
-        # Step 1: Prune context using Provence (if available)
-        if provence_model:
-            if args.verbose and console:
-                console.print(f"[yellow]📝 Pruning context with Provence reranker...[/yellow]")
-            pruned_context = prune_with_provence(
-                query, original_context, provence_model, args.pruning_threshold,
-                args.verbose, console
-            )
-        else:
-            pruned_context = original_context
-        
-        # Step 2: Summarize context to reduce duplication
-        if args.verbose and console:
-            console.print(f"[yellow]📝 Summarizing context to reduce duplication...[/yellow]")
-        summarized_context = summarize_context(query, pruned_context, llm, args.verbose, console)
-        
-        # Format final result
-        result = f"Found {len(retrieved_docs)} relevant previous conversation(s) (retrieved from rank_window={args.rank_window} candidates):\n\n"
-        result += f"Context Summary:\n{summarized_context}"
-        
-        if args.verbose and console:
-            console.print(f"[green]✅ Final context ready: {len(summarized_context)} characters[/green]")
-        
         return result
         
     except Exception as e:
@@ -117,8 +84,13 @@ def create_elasticsearch_memory_tool(
             query, es_client, es_index_name, embeddings, llm, provence_model, args, console
         )
     
+    # Async entry point runs the blocking pipeline in a worker thread so the event loop stays free
+    async def tool_coroutine(query: str) -> str:
+        return await asyncio.to_thread(tool_func, query)
+    
     return StructuredTool.from_function(
         func=tool_func,
+        coroutine=tool_coroutine,
         name="search_long_term_memory",
         description="""Search long-term memory for previous conversations and context. 
         Use this tool FIRST when you need to recall information from past conversations, 
@@ -1,5 +1,7 @@
 """Constants and default values for Elasticsearch Agent."""
 
+import os
+
 # Embedding model dimensions
 EMBEDDING_DIMENSIONS = {
     "text-embedding-3-small": 1536,
@@ -20,3 +22,51 @@ def get_embedding_dimension(embedding_model: str) -> int:
     """
     return EMBEDDING_DIMENSIONS.get(embedding_model, 1536)
 
+
+
+# Maximum number of entries kept by the in-process result caches
+PRUNING_CACHE_SIZE = 256
+SUMMARY_CACHE_SIZE = 256
+RETRIEVAL_CACHE_SIZE = 32
+EMBEDDING_CACHE_SIZE = 4096
+
+# Number of most recent checkpoints shown after each turn in verbose mode
+VERBOSE_CHECKPOINT_LIMIT = 5
+
+# Connections kept per Elasticsearch node (urllib3 defaults to 10)
+ES_MAX_CONNECTIONS = 32
+
+# Bulk indexing
+BULK_CHUNK_SIZE = 500
+BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+BULK_REQUEST_TIMEOUT = 60
+# Concurrent bulk requests in flight and chunks buffered ahead of them
+BULK_THREAD_COUNT = min(12, os.cpu_count() or 1)
+BULK_QUEUE_SIZE = 4
+# Batches at least this large are indexed with refresh/replicas/translog fsync relaxed
+BULK_TUNING_MIN_DOCS = 1000
+# Texts sent per embeddings request when indexing
+EMBEDDING_BATCH_SIZE = 256
+
+# Contexts at or below this many characters are not worth an LLM summarization call
+SUMMARY_MIN_CHARS = 2000
+
+# Adaptive retrieval cutoff: drop hits after the first score gap larger than
+# SCORE_GAP_RATIO * top score, keeping at least MIN_RETRIEVED_DOCS
+SCORE_GAP_RATIO = 0.1
+MIN_RETRIEVED_DOCS = 3
+
+# Output cap for the per-query context summary
+SUMMARY_MAX_TOKENS = 256
+
+# Conversation summaries: transcripts longer than this (~8K tokens) are split into
+# parts summarized concurrently, then merged in one final call
+SUMMARY_CHUNK_CHARS = 32000
+SUMMARY_MAX_WORKERS = 8
+
+# Messages kept in the agent's short-term thread state after each turn
+MAX_THREAD_MESSAGES = 20
+
+# Shared HTTP client connection pool
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 32
@@ -1,12 +1,13 @@
 """Main entry point for Elasticsearch Agent."""
 
 import os
+import uuid
 import warnings
 from typing import Optional, Any
 
 # Disable tokenizers parallelism warning (set before any tokenizers are loaded)
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 from elasticsearch import Elasticsearch
 from rich.console import Console
 
@@ -15,16 +16,18 @@ warnings.filterwarnings("ignore")
 
 # Import modules
 from .config.settings import get_args
-from .config.constants import get_embedding_dimension
+from .config.constants import get_embedding_dimension, VERBOSE_CHECKPOINT_LIMIT, MAX_THREAD_MESSAGES
 from .models.llm import initialize_llm
 from .models.embeddings import initialize_embeddings
 from .models.provence import initialize_provence
+from .models.warmup import start_warmup
 from .storage.elasticsearch_client import initialize_elasticsearch
-from .storage.elasticsearch_retrieval import check_elasticsearch_with_confidence
+from .storage.elasticsearch_retrieval import retrieve_and_process
+from .processing.relevance_check import check_context_relevance
 from .storage.elasticsearch_indexing import index_checkpoints_to_elasticsearch
 from .agents.agent_factory import create_agent
-from .utils.display import setup_console, process_chunks
-from .utils.checkpoints import process_checkpoints
+from .utils.display import setup_console, setup_logging, process_chunks
+from .utils.checkpoints import process_checkpoints, trim_thread_messages
 
 
 def main():
@@ -34,6 +37,7 @@ def main():
     
     # Setup console
     console = setup_console()
+    setup_logging(console)
     
     # Initialize models
     llm = initialize_llm()
@@ -57,14 +61,20 @@ def main():
         llm, es_client, es_index_name, embeddings, provence_model, args, console
     )
     
+    # Warm up connections and models while the user types the first question
+    warmup_thread = start_warmup(embeddings, provence_model, args.verbose, console)
+    
     # Main loop
     while True:
         # Get the user's question and display it in the terminal
         user_question = input("\nUser:\n")
+        
+        # Make sure warm-up is not still using the models
+        warmup_thread.join()
 
         # Check if the user wants to quit the chat
         if user_question.lower() == "quit":
-            console.print("\nAgent:\nHave a nice day! :wave:\n", style="black on white")
+            console.print("\nAgent:\nHave a nice day! :wave:\n", style="black on white", emoji=True)
             
             # Ask if user wants to store checkpoints to Elasticsearch
             if es_client:
@@ -96,23 +106,47 @@ def main():
         # STEP 1: Check Elasticsearch first with confidence threshold
         use_elasticsearch = False
         elasticsearch_context = ""
+        memory_context = ""
         max_score = 0.0
         
         if es_client and es_index_name:
             if args.verbose:
                 console.print(f"\n[bold yellow]🔍 Checking Elasticsearch first...[/bold yellow]")
             
-            has_results, context_or_msg, score = check_elasticsearch_with_confidence(
-                user_question, es_client, es_index_name, embeddings, llm, provence_model, args, console
-            )
+            # Embed the question once; retrieval reuses this vector
+            query_vector = None
+            try:
+                query_vector = embeddings.embed_query(user_question)
+            except Exception as e:
+                if args.verbose:
+                    console.print(f"[yellow]⚠️  Could not embed question up front: {e}[/yellow]")
             
-            if has_results:
-                use_elasticsearch = True
-                elasticsearch_context = context_or_msg
-                max_score = score
-                
+            # Retrieve, prune and summarize once; the result feeds either the direct
+            # answer or the agent (as a preloaded memory tool response)
+            try:
+                memory_context, score = retrieve_and_process(
+                    user_question, es_client, es_index_name, embeddings, llm, provence_model, args, console,
+                    precomputed_vector=query_vector
+                )
+            except Exception as e:
+                memory_context, score = "", 0.0
+                if args.verbose:
+                    console.print(f"[red]❌ Error checking Elasticsearch: {e}[/red]")
+            max_score = score
+            
+            if score >= args.confidence_threshold:
                 if args.verbose:
-                    console.print(f"[green]✅ Using Elasticsearch results (similarity: {max_score:.4f}, relevance check passed)[/green]")
+                    console.print(f"[yellow]🔍 Checking if context actually answers the question...[/yellow]")
+                is_relevant, relevance_score = check_context_relevance(user_question, memory_context, llm, args.verbose, console)
+                
+                if is_relevant:
+                    use_elasticsearch = True
+                    elasticsearch_context = memory_context
+                    
+                    if args.verbose:
+                        console.print(f"[green]✅ Using Elasticsearch results (similarity: {max_score:.4f}, relevance: {relevance_score:.2f})[/green]")
+                elif args.verbose:
+                    console.print(f"[yellow]⚠️  Retrieved context is not relevant (relevance score: {relevance_score:.2f}). Will use Tavily.[/yellow]")
             else:
                 if args.verbose:
                     console.print(f"[yellow]⚠️  Elasticsearch not sufficient (score: {score:.4f} < {args.confidence_threshold}). Will use Tavily.[/yellow]")
@@ -137,7 +171,8 @@ Answer:"""
             
             try:
                 answer = llm.invoke(answer_prompt).content
-                console.print(f"\nAgent:\n{answer}", style="black on white")
+                # LLM text is printed verbatim: no markup parsing or highlighting
+                console.print(f"\nAgent:\n{answer}", style="black on white", markup=False, highlight=False)
                 
                 # Store the interaction in memory for checkpoint tracking
                 # Add to agent's memory for consistency
@@ -155,20 +190,40 @@ Answer:"""
             if args.verbose:
                 console.print(f"[yellow]🌐 Using agent with Tavily for web search...[/yellow]")
             
+            messages = [HumanMessage(content=user_question)]
+            if memory_context and score > 0:
+                # Preload the memory tool call with the context computed above so the
+                # agent does not run retrieval, pruning and summarization a second time
+                # (only for real hits; status messages like "memory is empty" are not context)
+                tool_call_id = f"call_{uuid.uuid4().hex}"
+                messages += [
+                    AIMessage(content="", tool_calls=[{
+                        "name": "search_long_term_memory",
+                        "args": {"query": user_question},
+                        "id": tool_call_id,
+                    }]),
+                    ToolMessage(content=memory_context, tool_call_id=tool_call_id, name="search_long_term_memory"),
+                ]
+            
             # Use the stream method of the LangGraph agent to get the agent's answer
             for chunk in agent.stream(
-                {"messages": [HumanMessage(content=user_question)]},
+                {"messages": messages},
                 {"configurable": {"thread_id": "1"}},
             ):
                 # Process the chunks from the agent
                 process_chunks(chunk, console)
+        
+        # Bound the short-term history the agent replays on every turn
+        removed = trim_thread_messages(agent, {"configurable": {"thread_id": "1"}}, MAX_THREAD_MESSAGES)
+        if removed and args.verbose:
+            console.print(f"[blue]✂️  Trimmed {removed} older messages from short-term memory[/blue]")
 
         # Only process and display checkpoints if verbose mode is enabled
         if args.verbose:
-            # List all checkpoints that match a given configuration
+            # Lazily list checkpoints (newest first) that match a given configuration
             checkpoints = memory.list({"configurable": {"thread_id": "1"}})
-            # Process the checkpoints
-            process_checkpoints(checkpoints, console)
+            # Process only the most recent checkpoints
+            process_checkpoints(checkpoints, console, limit=VERBOSE_CHECKPOINT_LIMIT)
 
 
 if __name__ == "__main__":
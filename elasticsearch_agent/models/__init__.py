@@ -1,8 +1,10 @@
 """Models module for Elasticsearch Agent."""
 
+from .http_client import get_http_client
 from .llm import initialize_llm
-from .embeddings import initialize_embeddings
+from .embeddings import CachingEmbeddings, initialize_embeddings
 from .provence import initialize_provence
+from .warmup import start_warmup
 
-__all__ = ["initialize_llm", "initialize_embeddings", "initialize_provence"]
+__all__ = ["get_http_client", "initialize_llm", "CachingEmbeddings", "initialize_embeddings", "initialize_provence", "start_warmup"]
 
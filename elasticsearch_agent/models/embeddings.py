@@ -1,8 +1,59 @@
 """Embeddings initialization for Elasticsearch Agent."""
 
+import hashlib
 import os
+from typing import Any, List, Optional
 from langchain_openai import OpenAIEmbeddings
-from ..config.constants import get_embedding_dimension
+from pydantic import PrivateAttr
+from ..config.constants import get_embedding_dimension, EMBEDDING_CACHE_SIZE
+from ..utils.cache import LRUCache
+from .http_client import get_http_client
+
+
+class CachingEmbeddings(OpenAIEmbeddings):
+    """
+    OpenAI Embeddings that memoize vectors by SHA-1 of the input text.
+    
+    Repeated texts (the same question embedded by the confidence check and the
+    memory tool, or asked again in a later turn) skip the embeddings API call.
+    """
+    
+    _cache: LRUCache = PrivateAttr(default_factory=lambda: LRUCache(maxsize=EMBEDDING_CACHE_SIZE))
+    
+    def embed_documents(self, texts: List[str], chunk_size: Optional[int] = None, **kwargs: Any) -> List[List[float]]:
+        """
+        Embed texts, calling the API only for texts not already cached.
+        
+        Args:
+            texts: Texts to embed
+            chunk_size: Optional batch size forwarded to OpenAIEmbeddings
+            
+        Returns:
+            List of embeddings, one per text
+        """
+        keys = [hashlib.sha1(text.encode("utf-8")).hexdigest() for text in texts]
+        vectors = [self._cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        
+        if missing:
+            fresh = super().embed_documents([texts[i] for i in missing], chunk_size=chunk_size, **kwargs)
+            for i, vector in zip(missing, fresh):
+                vectors[i] = tuple(vector)
+                self._cache.put(keys[i], vectors[i])
+        
+        return [list(vector) for vector in vectors]
+    
+    def embed_query(self, text: str, **kwargs: Any) -> List[float]:
+        """
+        Embed a single query text through the cache.
+        
+        Args:
+            text: Text to embed
+            
+        Returns:
+            Embedding for the text
+        """
+        return self.embed_documents([text], **kwargs)[0]
 
 
 def initialize_embeddings():
@@ -13,11 +64,11 @@ def initialize_embeddings():
         Tuple of (embeddings, embedding_model, embedding_dimension)
     """
     embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
-    embeddings = OpenAIEmbeddings(
+    embeddings = CachingEmbeddings(
         model=embedding_model,
-        openai_api_key=os.getenv("OPENAI_API_KEY")
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=get_http_client()
     )
     embedding_dimension = get_embedding_dimension(embedding_model)
     
     return embeddings, embedding_model, embedding_dimension
-
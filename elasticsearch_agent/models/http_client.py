@@ -0,0 +1,34 @@
+"""Shared HTTP client for Elasticsearch Agent."""
+
+from functools import lru_cache
+import httpx
+from ..config.constants import HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """
+    Get the process-wide HTTP client shared by the OpenAI chat and embeddings clients.
+    
+    Keeps connections alive for the whole session, so the TLS handshake is paid once,
+    and uses HTTP/2 multiplexing when the optional h2 package is installed.
+    
+    Returns:
+        Shared httpx.Client instance
+    """
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    
+    return httpx.Client(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        # Same defaults as the OpenAI SDK's own client
+        timeout=httpx.Timeout(600.0, connect=5.0),
+        follow_redirects=True
+    )
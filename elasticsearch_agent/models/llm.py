@@ -2,6 +2,7 @@
 
 import os
 from langchain_openai import ChatOpenAI
+from .http_client import get_http_client
 
 
 def initialize_llm() -> ChatOpenAI:
@@ -14,5 +15,6 @@ def initialize_llm() -> ChatOpenAI:
     return ChatOpenAI(
         api_key=os.getenv("OPENAI_API_KEY"),
         model="gpt-4o-mini",
+        http_client=get_http_client(),
     )
 
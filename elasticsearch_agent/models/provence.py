@@ -16,6 +16,7 @@ def initialize_provence(args, console: Console) -> Optional[Any]:
         Provence model instance or None if unavailable
     """
     try:
+        import torch
         from transformers import AutoModel
         import nltk
         
@@ -26,12 +27,34 @@ def initialize_provence(args, console: Console) -> Optional[Any]:
             nltk.download('punkt', quiet=True)
         
         console.print("[yellow]🔧 Loading Provence reranker model...[/yellow]")
+        # Half precision on GPU (tensor cores); CPU loads FP32 and is quantized below
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        dtype = torch.float16 if device == "cuda" else torch.float32
         provence_model = AutoModel.from_pretrained(
             "naver/provence-reranker-debertav3-v1",
+            torch_dtype=dtype,
             trust_remote_code=True
         )
+        provence_model.to(device)
         provence_model.eval()
-        console.print(f"[green]✅ Provence reranker loaded successfully![/green]")
+        precision = str(dtype).replace("torch.", "")
+        
+        # On CPU, swap Linear layers for dynamically quantized int8 kernels (VNNI/AVX-512)
+        if device == "cpu":
+            try:
+                provence_model = torch.ao.quantization.quantize_dynamic(
+                    provence_model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                precision = "int8 (dynamic)"
+            except Exception as e:
+                console.print(f"[yellow]⚠️  Int8 quantization unavailable, using float32: {e}[/yellow]")
+        
+        # Pin the tokenizer length so inputs are truncated once to the model's window
+        tokenizer = getattr(provence_model, "tokenizer", None)
+        if tokenizer is not None:
+            tokenizer.model_max_length = getattr(provence_model.config, "max_position_embeddings", 512)
+        
+        console.print(f"[green]✅ Provence reranker loaded successfully! (device: {device}, precision: {precision})[/green]")
         console.print(f"[blue]📊 Pruning threshold: {args.pruning_threshold} (0.1=conservative, 0.5=aggressive)[/blue]")
         return provence_model
     except Exception as e:
@@ -0,0 +1,71 @@
+"""Background model warm-up for Elasticsearch Agent."""
+
+import threading
+from typing import Optional, Any
+from rich.console import Console
+
+
+def _warm_up(embeddings, provence_model: Optional[Any], verbose: bool, console: Optional[Console]):
+    """
+    Open the embeddings HTTP connection and run a first Provence forward pass.
+    
+    Args:
+        embeddings: Embeddings model instance
+        provence_model: Provence reranker model (optional)
+        verbose: Whether to show verbose output
+        console: Rich console for output
+    """
+    try:
+        # Establishes the TLS session to the embeddings endpoint
+        embeddings.embed_query("warm-up")
+    except Exception as e:
+        if verbose and console:
+            console.print(f"[yellow]⚠️  Embeddings warm-up failed: {e}[/yellow]")
+    
+    if provence_model is None:
+        return
+    
+    try:
+        import torch
+        
+        # First forward pass pays for lazy kernel/allocator initialization
+        with torch.inference_mode():
+            provence_model.process(
+                question="warm-up",
+                context="This sentence warms up the reranker.",
+                threshold=0.1,
+                always_select_title=False,
+                enable_warnings=False
+            )
+    except Exception as e:
+        if verbose and console:
+            console.print(f"[yellow]⚠️  Provence warm-up failed: {e}[/yellow]")
+
+
+def start_warmup(
+    embeddings,
+    provence_model: Optional[Any],
+    verbose: bool = False,
+    console: Optional[Console] = None
+) -> threading.Thread:
+    """
+    Warm up remote connections and local models in a daemon thread, so the cost
+    is hidden behind the time the user spends typing the first question.
+    
+    Args:
+        embeddings: Embeddings model instance
+        provence_model: Provence reranker model (optional)
+        verbose: Whether to show verbose output
+        console: Rich console for output
+        
+    Returns:
+        The started warm-up thread (join it before using the models)
+    """
+    thread = threading.Thread(
+        target=_warm_up,
+        args=(embeddings, provence_model, verbose, console),
+        name="warmup",
+        daemon=True
+    )
+    thread.start()
+    return thread
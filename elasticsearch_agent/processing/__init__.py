@@ -1,8 +1,7 @@
 """Processing module for Elasticsearch Agent."""
 
-from .context_pruning import prune_with_provence
+from .context_pruning import prune_with_provence, prune_with_provence_batch
 from .context_summarization import summarize_context
 from .relevance_check import check_context_relevance
 
-__all__ = ["prune_with_provence", "summarize_context", "check_context_relevance"]
-
+__all__ = ["prune_with_provence", "prune_with_provence_batch", "summarize_context", "check_context_relevance"]
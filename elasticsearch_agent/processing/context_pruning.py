@@ -1,7 +1,12 @@
 """Context pruning with Provence reranker for Elasticsearch Agent."""
 
-from typing import Optional, Any
+from typing import List, Optional, Any
 from rich.console import Console
+from ..config.constants import PRUNING_CACHE_SIZE
+from ..utils.cache import LRUCache, hash_key
+
+# Pruned contexts keyed by hash of (threshold, query, context)
+_pruning_cache = LRUCache(maxsize=PRUNING_CACHE_SIZE)
 
 
 def prune_with_provence(
@@ -31,15 +36,26 @@ def prune_with_provence(
     if provence_model is None:
         return context
     
+    cache_key = hash_key(threshold, query, context)
+    cached_context = _pruning_cache.get(cache_key)
+    if cached_context is not None:
+        if verbose and console:
+            console.print(f"[cyan]📊 Pruning cache hit: {len(cached_context)}/{len(context)} chars[/cyan]")
+        return cached_context
+    
     try:
-        # Use Provence's process method
-        provence_output = provence_model.process(
-            question=query,
-            context=context,
-            threshold=threshold,
-            always_select_title=False,
-            enable_warnings=False
-        )
+        # torch is available whenever a Provence model was loaded
+        import torch
+        
+        # Use Provence's process method (inference only, no autograd bookkeeping)
+        with torch.inference_mode():
+            provence_output = provence_model.process(
+                question=query,
+                context=context,
+                threshold=threshold,
+                always_select_title=False,
+                enable_warnings=False
+            )
         
         # Extract pruned context from output
         pruned_context = provence_output.get('pruned_context', context)
@@ -53,7 +69,9 @@ def prune_with_provence(
         if verbose and console:
             console.print(f"[cyan]📊 Pruning stats: {pruned_length}/{original_length} chars ({reduction_pct:.1f}% reduction, threshold={threshold:.2f}, rerank_score={reranking_score:.3f})[/cyan]")
         
-        return pruned_context if pruned_context else context
+        result = pruned_context if pruned_context else context
+        _pruning_cache.put(cache_key, result)
+        return result
         
     except Exception as e:
         if console:
@@ -61,3 +79,83 @@ def prune_with_provence(
             console.print(f"[yellow]⚠️ Falling back to original context[/yellow]")
         return context
 
+
+
+def prune_with_provence_batch(
+    query: str,
+    documents: List[str],
+    provence_model: Optional[Any],
+    threshold: float,
+    verbose: bool = False,
+    console: Optional[Console] = None
+) -> List[str]:
+    """
+    Prune several retrieved documents with a single batched Provence forward pass
+    
+    Args:
+        query: User's query/question
+        documents: Retrieved documents to prune
+        provence_model: Provence reranker model instance (None if unavailable)
+        threshold: Relevance threshold (0-1) for Provence reranker
+        verbose: Whether to show verbose output
+        console: Rich console for output
+        
+    Returns:
+        Pruned documents, in the same order as the input
+    """
+    if provence_model is None:
+        return list(documents)
+    
+    # Serve cached documents directly; only the rest go through the model
+    cache_keys = [hash_key(threshold, query, document) for document in documents]
+    pruned_docs = [_pruning_cache.get(key) for key in cache_keys]
+    missing = [i for i, pruned in enumerate(pruned_docs) if pruned is None]
+    
+    if not missing:
+        if verbose and console:
+            console.print(f"[cyan]📊 Pruning cache hit for all {len(documents)} documents[/cyan]")
+        return pruned_docs
+    
+    try:
+        import torch
+        
+        # One question with K contexts is a single batched call
+        with torch.inference_mode():
+            provence_output = provence_model.process(
+                question=[query],
+                context=[[documents[i] for i in missing]],
+                threshold=threshold,
+                always_select_title=False,
+                enable_warnings=False
+            )
+        
+        batch_pruned = provence_output.get('pruned_context')
+        batch_scores = provence_output.get('reranking_score')
+        # Batched output is nested per question
+        if isinstance(batch_pruned, list) and batch_pruned and isinstance(batch_pruned[0], list):
+            batch_pruned = batch_pruned[0]
+            batch_scores = batch_scores[0] if batch_scores else None
+        if not isinstance(batch_pruned, list) or len(batch_pruned) != len(missing):
+            raise ValueError("unexpected batched Provence output")
+        
+        for i, pruned in zip(missing, batch_pruned):
+            pruned_docs[i] = pruned if pruned else documents[i]
+            _pruning_cache.put(cache_keys[i], pruned_docs[i])
+        
+        if verbose and console:
+            original_length = sum(len(documents[i]) for i in missing)
+            pruned_length = sum(len(pruned_docs[i]) for i in missing)
+            reduction_pct = ((original_length - pruned_length) / original_length * 100) if original_length > 0 else 0
+            top_score = max(batch_scores) if batch_scores else 0.0
+            console.print(f"[cyan]📊 Pruning stats: {pruned_length}/{original_length} chars across {len(missing)} documents ({reduction_pct:.1f}% reduction, threshold={threshold:.2f}, top rerank_score={top_score:.3f})[/cyan]")
+        
+        return pruned_docs
+        
+    except Exception as e:
+        # Model variant without batch support: fall back to one call per document
+        if verbose and console:
+            console.print(f"[yellow]⚠️ Batched Provence pruning unavailable ({str(e)}), pruning documents one by one[/yellow]")
+        for i in missing:
+            pruned_docs[i] = prune_with_provence(query, documents[i], provence_model, threshold, verbose, console)
+        return pruned_docs
+
@@ -1,7 +1,19 @@
 """Context summarization for Elasticsearch Agent."""
 
 from typing import Optional
+from langchain_core.messages import HumanMessage, SystemMessage
 from rich.console import Console
+from ..config.constants import SUMMARY_CACHE_SIZE, SUMMARY_MAX_TOKENS
+from ..utils.cache import LRUCache, hash_key
+
+# LLM summaries keyed by hash of (query, context)
+_summary_cache = LRUCache(maxsize=SUMMARY_CACHE_SIZE)
+
+# Static instructions, sent as a system message so the prefix is identical on every call
+_SUMMARIZE_SYSTEM = (
+    "Condense the conversation context into a summary that answers or supports the question. "
+    "Keep every relevant fact and detail, drop duplicates, and keep chronological order where it matters."
+)
 
 
 def summarize_context(
@@ -24,23 +36,21 @@ def summarize_context(
     Returns:
         Summarized context
     """
+    cache_key = hash_key(query, context)
+    cached_summary = _summary_cache.get(cache_key)
+    if cached_summary is not None:
+        if verbose and console:
+            console.print(f"[cyan]📝 Summary cache hit: {len(cached_summary)}/{len(context)} chars[/cyan]")
+        return cached_summary
+    
     try:
-        summary_prompt = f"""You are an expert at summarizing conversation context.
-
-Your task: Analyze the provided conversation context and produce a condensed summary that fully answers or supports the user's specific question.
-
-The summary must:
-1. Preserve every fact, detail, and information that directly relates to the question
-2. Eliminate redundancy and duplicate information
-3. Maintain chronological flow when relevant
-4. Focus on information that helps answer: "{query}"
-
-Context to summarize:
-{context}
-
-Provide a concise summary that preserves all relevant information:"""
+        messages = [
+            SystemMessage(content=_SUMMARIZE_SYSTEM),
+            HumanMessage(content=f"Question: {query}\n\nContext:\n{context}")
+        ]
 
-        summary = llm.invoke(summary_prompt).content
+        summary = llm.bind(max_tokens=SUMMARY_MAX_TOKENS).invoke(messages).content
+        _summary_cache.put(cache_key, summary)
         
         if verbose and console:
             original_length = len(context)
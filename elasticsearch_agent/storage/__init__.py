@@ -1,22 +1,29 @@
 """Storage module for Elasticsearch Agent."""
 
-from .elasticsearch_client import initialize_elasticsearch
+from .elasticsearch_client import initialize_elasticsearch, get_elasticsearch_client
 from .elasticsearch_retrieval import (
     retrieve_from_elasticsearch,
-    check_elasticsearch_with_confidence
+    process_retrieved_context,
+    retrieve_and_process,
+    clear_retrieval_cache
 )
 from .elasticsearch_indexing import (
     index_checkpoints_to_elasticsearch,
     extract_messages_from_checkpoints,
     summarize_conversation
 )
+from .vector_encoding import encode_vector
 
 __all__ = [
     "initialize_elasticsearch",
+    "get_elasticsearch_client",
     "retrieve_from_elasticsearch",
-    "check_elasticsearch_with_confidence",
+    "process_retrieved_context",
+    "retrieve_and_process",
+    "clear_retrieval_cache",
     "index_checkpoints_to_elasticsearch",
     "extract_messages_from_checkpoints",
     "summarize_conversation",
+    "encode_vector",
 ]
 
@@ -1,10 +1,53 @@
 """Elasticsearch client initialization for Elasticsearch Agent."""
 
+import hashlib
 import os
-from typing import Tuple, Optional
+import threading
+from typing import Dict, Tuple, Optional
 from elasticsearch import Elasticsearch
 from elasticsearch.exceptions import RequestError, ConnectionError as ESConnectionError
 from rich.console import Console
+from ..config.constants import ES_MAX_CONNECTIONS
+
+try:
+    # Only defined by elasticsearch-py when orjson is installed
+    from elasticsearch.serializer import OrjsonSerializer
+except ImportError:  # Optional speed-up; the client falls back to stdlib json
+    OrjsonSerializer = None
+
+
+_clients: Dict[Tuple[str, str], Elasticsearch] = {}
+_clients_lock = threading.Lock()
+
+
+def get_elasticsearch_client(es_url: str, es_api_key: str) -> Elasticsearch:
+    """
+    Return the process-wide Elasticsearch client for a URL/API key pair, creating it once.
+    
+    Args:
+        es_url: Elasticsearch URL
+        es_api_key: Elasticsearch API key
+        
+    Returns:
+        Shared Elasticsearch client (its connection pool is reused across calls)
+    """
+    key = (es_url, hashlib.sha256(es_api_key.encode("utf-8")).hexdigest())
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = Elasticsearch(
+                hosts=[es_url],
+                api_key=es_api_key,
+                request_timeout=30,
+                connections_per_node=ES_MAX_CONNECTIONS,
+                # gzip request bodies: bulk payloads are dominated by float vectors
+                http_compress=True,
+                retry_on_timeout=True,
+                max_retries=3,
+                serializer=OrjsonSerializer() if OrjsonSerializer is not None else None
+            )
+            _clients[key] = client
+        return client
 
 
 def initialize_elasticsearch(embedding_dimension: int, console: Console) -> Tuple[Optional[Elasticsearch], Optional[str], bool]:
@@ -27,11 +70,7 @@ def initialize_elasticsearch(embedding_dimension: int, console: Console) -> Tupl
         return None, None, False
     
     try:
-        es_client = Elasticsearch(
-            hosts=[es_url],
-            api_key=es_api_key,
-            request_timeout=30
-        )
+        es_client = get_elasticsearch_client(es_url, es_api_key)
         
         # Test connection with proper exception handling
         if not es_client.ping():
@@ -59,19 +98,25 @@ def initialize_elasticsearch(embedding_dimension: int, console: Console) -> Tupl
                 index_mapping = {
                     "mappings": {
                         "properties": {
-                            "text": {"type": "text"},
+                            # kNN retrieval never scores text with BM25, so norms and positions are dropped
+                            "text": {"type": "text", "norms": False, "index_options": "freqs"},
                             "vector": {
                                 "type": "dense_vector",
                                 "dims": embedding_dimension,
                                 "index": True,
-                                "similarity": "cosine"
+                                # Vectors are L2-normalized by vector_encoding.encode_vector
+                                "similarity": "dot_product",
+                                # HNSW graph over int8 scalar-quantized vectors (~4x less memory)
+                                "index_options": {"type": "int8_hnsw", "m": 16, "ef_construction": 100}
                             },
                             "thread_id": {"type": "keyword"},
-                            "checkpoint_id": {"type": "keyword"},
+                            "checkpoint_id": {"type": "keyword", "doc_values": False},
                             "timestamp": {"type": "date"},
                             "message_type": {"type": "keyword"},
+                            # doc_values kept: the pre-index dedup aggregates on message_id
                             "message_id": {"type": "keyword"},
-                            "content": {"type": "text"}
+                            # Same text as "text"; an alias avoids analyzing and storing it twice
+                            "content": {"type": "alias", "path": "text"}
                         }
                     }
                 }
@@ -92,17 +137,19 @@ def initialize_elasticsearch(embedding_dimension: int, console: Console) -> Tupl
             # Index already exists
             console.print(f"[green]📋 Using existing Elasticsearch index: {index_name}[/green]")
             
-            # Verify index has the correct mapping
-            try:
-                current_mapping = es_client.indices.get_mapping(index=index_name)
-                # Check if vector field exists with correct dimension
-                props = current_mapping[index_name]["mappings"].get("properties", {})
-                if "vector" not in props:
-                    console.print(f"[yellow]⚠️  Warning: Index exists but missing vector field. May need to recreate.[/yellow]")
-                elif props.get("vector", {}).get("dims") != embedding_dimension:
-                    console.print(f"[yellow]⚠️  Warning: Index vector dimension mismatch. Expected {embedding_dimension}, found {props.get('vector', {}).get('dims')}[/yellow]")
-            except Exception as e:
-                console.print(f"[yellow]⚠️  Could not verify index mapping: {e}[/yellow]")
+            # Verifying the mapping costs a round-trip on every start, so it is opt-in
+            # (VERIFY_ES_MAPPING=1/true/yes; "0" or "false" leave it off)
+            if os.getenv("VERIFY_ES_MAPPING", "").strip().lower() in ("1", "true", "yes"):
+                try:
+                    current_mapping = es_client.indices.get_mapping(index=index_name)
+                    # Check if vector field exists with correct dimension
+                    props = current_mapping[index_name]["mappings"].get("properties", {})
+                    if "vector" not in props:
+                        console.print(f"[yellow]⚠️  Warning: Index exists but missing vector field. May need to recreate.[/yellow]")
+                    elif props.get("vector", {}).get("dims") != embedding_dimension:
+                        console.print(f"[yellow]⚠️  Warning: Index vector dimension mismatch. Expected {embedding_dimension}, found {props.get('vector', {}).get('dims')}[/yellow]")
+                except Exception as e:
+                    console.print(f"[yellow]⚠️  Could not verify index mapping: {e}[/yellow]")
         
         return es_client, index_name, is_new_index
         
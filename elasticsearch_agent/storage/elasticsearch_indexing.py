@@ -1,15 +1,81 @@
 """Elasticsearch indexing functions for Elasticsearch Agent."""
 
-from typing import List, Dict, Any, Optional
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime
 from elasticsearch import Elasticsearch
-from langchain_core.messages import HumanMessage, AIMessage
+from elasticsearch.exceptions import ConflictError
+from elasticsearch.helpers import parallel_bulk
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langchain_core.prompts import ChatPromptTemplate
 from rich.console import Console
+from ..config.constants import (
+    BULK_CHUNK_SIZE,
+    BULK_MAX_CHUNK_BYTES,
+    BULK_REQUEST_TIMEOUT,
+    BULK_THREAD_COUNT,
+    BULK_QUEUE_SIZE,
+    BULK_TUNING_MIN_DOCS,
+    EMBEDDING_BATCH_SIZE,
+    SUMMARY_CHUNK_CHARS,
+    SUMMARY_MAX_WORKERS
+)
+from .elasticsearch_retrieval import clear_retrieval_cache
+from .vector_encoding import encode_vector
+
+log = logging.getLogger("es_agent.indexing")
+
+
+# (transcript speaker, indexed message_type) per message class, looked up by exact type;
+# subclasses (e.g. AIMessageChunk) fall back to isinstance
+_MSG_LABEL = {HumanMessage: ("User", "human"), AIMessage: ("Agent", "ai")}
+
+
+def _message_label(message) -> Optional[Tuple[str, str]]:
+    """Return the (speaker, message_type) label for a LangChain message, or None for other messages."""
+    label = _MSG_LABEL.get(type(message))
+    if label is None:
+        label = next((value for cls, value in _MSG_LABEL.items() if isinstance(message, cls)), None)
+    return label
+
+
+def _iter_unique_messages(checkpoints) -> Iterator[Tuple[Any, str, str]]:
+    """
+    Yield each message in the checkpoints once, in chronological order, with the
+    checkpoint it was first seen in.
+    
+    Checkpoints are cumulative snapshots, but short-term history is trimmed after each
+    turn, so no single checkpoint is guaranteed to hold every message; all checkpoints
+    are scanned and a message ID set drops the repeats. The checkpointer lists the newest
+    checkpoint first, which after a trim holds only the latest turns, so checkpoints are
+    walked oldest-first to keep earlier turns ahead of later ones.
+    
+    Parameters:
+        checkpoints: List of checkpoint tuples, newest first (as returned by memory.list())
+        
+    Returns:
+        Iterator of (message, checkpoint_id, timestamp) tuples
+    """
+    seen_message_ids = set()
+    for checkpoint_tuple in reversed(list(checkpoints)):
+        checkpoint = checkpoint_tuple.checkpoint
+        checkpoint_id = checkpoint.get("id", "")
+        timestamp = checkpoint.get("ts") or datetime.now().isoformat()
+        for message in checkpoint["channel_values"].get("messages", ()):
+            if message.id in seen_message_ids:
+                continue
+            seen_message_ids.add(message.id)
+            yield message, checkpoint_id, timestamp
 
 
 def extract_messages_from_checkpoints(checkpoints, thread_id: str) -> List[Dict[str, Any]]:
     """
     Extract all messages from checkpoints and prepare them for indexing.
+    Long-term memory search results are skipped: they are summaries of documents
+    already in the index, and indexing them would feed recalled context back in.
     
     Parameters:
         checkpoints: List of checkpoint tuples
@@ -18,46 +84,147 @@ def extract_messages_from_checkpoints(checkpoints, thread_id: str) -> List[Dict[
     Returns:
         List of dictionaries containing message data ready for indexing
     """
-    messages_to_index = []
-    seen_message_ids = set()  # Avoid indexing duplicate messages
+    return [
+        {
+            "text": message.content,
+            "thread_id": thread_id,
+            "checkpoint_id": checkpoint_id,
+            "timestamp": timestamp,
+            "message_type": (_message_label(message) or ("", "other"))[1],
+            "message_id": message.id
+        }
+        for message, checkpoint_id, timestamp in _iter_unique_messages(checkpoints)
+        if not (isinstance(message, ToolMessage) and message.name == "search_long_term_memory")
+    ]
+
+
+def _existing_message_ids(es_client: Elasticsearch, es_index_name: str, message_ids: List[str]) -> set:
+    """
+    Look up which message IDs are already indexed, with one terms aggregation per 10,000 IDs.
+    Aggregating rather than reading hits keeps the result exact even when an ID has been
+    indexed more than once.
     
-    for checkpoint_tuple in checkpoints:
-        checkpoint = checkpoint_tuple.checkpoint
-        checkpoint_id = checkpoint.get("id", "")
-        timestamp = checkpoint.get("ts", datetime.now().isoformat())
-        messages = checkpoint["channel_values"].get("messages", [])
+    Parameters:
+        es_client: Elasticsearch client instance
+        es_index_name: Name of the Elasticsearch index
+        message_ids: Message IDs about to be indexed
         
-        for message in messages:
-            # Skip if we've already indexed this message
-            if message.id in seen_message_ids:
-                continue
-            seen_message_ids.add(message.id)
-            
-            # Determine message type
-            if isinstance(message, HumanMessage):
-                message_type = "human"
-            elif isinstance(message, AIMessage):
-                message_type = "ai"
-            else:
-                message_type = "other"
-            
-            # Create text for embedding
-            text_content = message.content
-            
-            # Store message data
-            message_data = {
-                "text": text_content,
-                "thread_id": thread_id,
-                "checkpoint_id": checkpoint_id,
-                "timestamp": timestamp,
-                "message_type": message_type,
-                "message_id": message.id,
-                "content": text_content
-            }
-            
-            messages_to_index.append(message_data)
+    Returns:
+        Set of the given message IDs that already exist in the index
+    """
+    existing = set()
+    for start in range(0, len(message_ids), 10000):
+        chunk = message_ids[start:start + 10000]
+        response = es_client.search(
+            index=es_index_name,
+            query={"bool": {"filter": [{"terms": {"message_id": chunk}}]}},
+            aggs={"message_ids": {"terms": {"field": "message_id", "size": len(chunk)}}},
+            size=0,
+            track_total_hits=False
+        )
+        existing.update(bucket["key"] for bucket in response["aggregations"]["message_ids"]["buckets"])
+    return existing
+
+
+# Index settings relaxed for the duration of a large bulk load
+_BULK_SETTINGS = {
+    "index.refresh_interval": "-1",
+    "index.translog.durability": "async",
+    "index.number_of_replicas": 0,
+}
+
+
+@contextmanager
+def _bulk_tuning(es_client: Elasticsearch, es_index_name: str, console: Optional[Console] = None):
+    """
+    Relax refresh, translog and replica settings during a bulk load and restore them afterwards.
+    
+    The original values are read first and put back (followed by a refresh so the new
+    documents become searchable) even if indexing fails. If the settings cannot be
+    changed (e.g. on managed or serverless deployments), indexing proceeds untuned.
+    
+    Parameters:
+        es_client: Elasticsearch client instance
+        es_index_name: Name of the Elasticsearch index
+        console: Rich console for output
+    """
+    original = None
+    try:
+        current = es_client.indices.get_settings(index=es_index_name, flat_settings=True)
+        current = current[es_index_name]["settings"]
+        # Missing keys restore to None, which resets them to the cluster default
+        original = {key: current.get(key) for key in _BULK_SETTINGS}
+        es_client.indices.put_settings(index=es_index_name, settings=_BULK_SETTINGS)
+    except Exception as e:
+        original = None
+        if console:
+            console.print(f"[yellow]⚠️  Could not tune index settings for bulk load: {e}[/yellow]")
+    
+    try:
+        yield
+    finally:
+        if original is not None:
+            try:
+                es_client.indices.put_settings(index=es_index_name, settings=original)
+                es_client.indices.refresh(index=es_index_name)
+            except Exception as e:
+                if console:
+                    console.print(f"[red]❌ Could not restore index settings after bulk load: {e}[/red]")
+
+
+def _split_transcript(lines: List[str], max_chars: int) -> List[str]:
+    """
+    Group transcript lines into consecutive parts of at most max_chars characters.
+    Lines are never split, so a single oversized line becomes its own part.
     
-    return messages_to_index
+    Parameters:
+        lines: Transcript lines in conversation order
+        max_chars: Target maximum size of each part
+        
+    Returns:
+        List of transcript parts joined with blank lines
+    """
+    parts, current, size = [], [], 0
+    for line in lines:
+        if current and size + len(line) > max_chars:
+            parts.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 2
+    if current:
+        parts.append("\n\n".join(current))
+    return parts
+
+
+# Prompts built once at import; the static system prefix is identical on every call,
+# so providers can serve it from their prompt cache
+_SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", (
+        "You are an expert at summarizing conversations. Create a comprehensive summary of the "
+        "conversation that preserves all important information, facts, and context.\n\n"
+        "The summary should:\n"
+        "1. Preserve all key facts, names, preferences, and information discussed\n"
+        "2. Maintain the flow and context of the conversation\n"
+        "3. Be concise but complete\n"
+        "4. Include important details that might be needed for future reference"
+    )),
+    ("user", "Conversation:\n{transcript}\n\nProvide a comprehensive summary:"),
+])
+
+_REDUCE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", (
+        "The user provides summaries of consecutive parts of one conversation, in order. Merge them "
+        "into a single comprehensive summary that preserves all key facts, names, preferences, and "
+        "information, without repeating anything."
+    )),
+    ("user", "Partial summaries:\n{partials}\n\nProvide the merged summary:"),
+])
+
+
+def _summarize_transcript(transcript: str, llm) -> str:
+    """Summarize one conversation transcript (or part of one) with the LLM."""
+    chain = _SUMMARY_PROMPT | llm.bind(temperature=0, seed=0)
+    return chain.invoke({"transcript": transcript}).content
 
 
 def summarize_conversation(checkpoints, thread_id: str, llm, verbose: bool = False, console: Optional[Console] = None) -> str:
@@ -77,44 +244,33 @@ def summarize_conversation(checkpoints, thread_id: str, llm, verbose: bool = Fal
     try:
         # Extract all messages in chronological order
         all_messages = []
-        seen_message_ids = set()
         
-        for checkpoint_tuple in checkpoints:
-            checkpoint = checkpoint_tuple.checkpoint
-            timestamp = checkpoint.get("ts", datetime.now().isoformat())
-            messages = checkpoint["channel_values"].get("messages", [])
-            
-            for message in messages:
-                if message.id in seen_message_ids:
-                    continue
-                seen_message_ids.add(message.id)
-                
-                if isinstance(message, HumanMessage):
-                    all_messages.append(f"User ({timestamp}): {message.content}")
-                elif isinstance(message, AIMessage):
-                    all_messages.append(f"Agent ({timestamp}): {message.content}")
+        for message, _, timestamp in _iter_unique_messages(checkpoints):
+            label = _message_label(message)
+            if label is None:
+                continue
+            all_messages.append(f"{label[0]} ({timestamp}): {message.content}")
         
         if not all_messages:
             return ""
         
         # Combine all messages into a conversation transcript
         conversation_transcript = "\n\n".join(all_messages)
+        parts = _split_transcript(all_messages, SUMMARY_CHUNK_CHARS)
         
-        # Summarize using LLM
-        summary_prompt = f"""You are an expert at summarizing conversations. Create a comprehensive summary of the following conversation that preserves all important information, facts, and context.
-
-The summary should:
-1. Preserve all key facts, names, preferences, and information discussed
-2. Maintain the flow and context of the conversation
-3. Be concise but complete
-4. Include important details that might be needed for future reference
-
-Conversation:
-{conversation_transcript}
-
-Provide a comprehensive summary:"""
-
-        summary = llm.invoke(summary_prompt).content
+        if len(parts) == 1:
+            summary = _summarize_transcript(conversation_transcript, llm)
+        else:
+            # Map: summarize the parts concurrently (LLM calls are I/O-bound)
+            if verbose and console:
+                console.print(f"[cyan]📝 Summarizing long conversation in {len(parts)} parts...[/cyan]")
+            with ThreadPoolExecutor(max_workers=min(SUMMARY_MAX_WORKERS, len(parts))) as pool:
+                partial_summaries = list(pool.map(lambda part: _summarize_transcript(part, llm), parts))
+            
+            # Reduce: merge the partial summaries into one
+            partials_text = "\n\n".join(f"Part {i}: {partial}" for i, partial in enumerate(partial_summaries, 1))
+            chain = _REDUCE_PROMPT | llm.bind(temperature=0, seed=0)
+            summary = chain.invoke({"partials": partials_text}).content
         
         if verbose and console:
             original_length = len(conversation_transcript)
@@ -142,7 +298,10 @@ def index_checkpoints_to_elasticsearch(
     llm,
     summarize: bool = False,
     verbose: bool = False,
-    console: Optional[Console] = None
+    console: Optional[Console] = None,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    max_chunk_bytes: int = BULK_MAX_CHUNK_BYTES,
+    thread_count: int = BULK_THREAD_COUNT
 ):
     """
     Index checkpoint messages to Elasticsearch with embeddings.
@@ -159,6 +318,9 @@ def index_checkpoints_to_elasticsearch(
                    If False, index each message individually.
         verbose: Whether to show verbose output
         console: Rich console for output
+        chunk_size: Maximum number of documents per bulk request
+        max_chunk_bytes: Maximum size in bytes of a bulk request
+        thread_count: Number of bulk requests sent concurrently
     """
     if not es_client or not es_index_name:
         if console:
@@ -200,20 +362,13 @@ def index_checkpoints_to_elasticsearch(
             # Create a single document for the summarized conversation
             doc_id = f"{thread_id}_summary_{int(datetime.now().timestamp())}"
             
-            # Check if this summary already exists (optional - you might want to allow multiple summaries)
-            if es_client.exists(index=es_index_name, id=doc_id):
-                if console:
-                    console.print("[yellow]⚠️  Summary document already exists. Skipping.[/yellow]")
-                return
-            
             # Generate embedding for the summary
             if console:
                 console.print("[yellow]🔄 Generating embedding and indexing summary to Elasticsearch...[/yellow]")
-            embedding = embeddings.embed_query(conversation_summary)
+            embedding = encode_vector(embeddings.embed_query(conversation_summary))
             
             document = {
                 "text": conversation_summary,
-                "content": conversation_summary,
                 "thread_id": thread_id,
                 "checkpoint_id": "summary",
                 "timestamp": last_timestamp,
@@ -226,16 +381,22 @@ def index_checkpoints_to_elasticsearch(
             }
             
             try:
-                es_client.index(
+                # create() rejects an existing ID with a 409, replacing a separate exists() probe.
+                # No transport retries: a timed-out create that did land would come back as a 409
+                es_client.options(retry_on_timeout=False, max_retries=0).create(
                     index=es_index_name,
                     id=doc_id,
                     document=document
                 )
+                clear_retrieval_cache()
                 if console:
                     console.print(f"\n[green]✅ Summary indexed successfully![/green]")
                     console.print(f"[blue]📊 Summary length: {len(conversation_summary)} characters[/blue]")
                     console.print(f"[blue]📊 Document ID: {doc_id}[/blue]")
                     console.print(f"[blue]📊 Index: {es_index_name}[/blue]")
+            except ConflictError:
+                if console:
+                    console.print("[yellow]⚠️  Summary document already exists. Skipping.[/yellow]")
             except Exception as e:
                 if console:
                     console.print(f"[red]❌ Error indexing summary: {e}[/red]")
@@ -257,51 +418,84 @@ def index_checkpoints_to_elasticsearch(
             if console:
                 console.print(f"[blue]📝 Found {len(messages_to_index)} messages to index[/blue]")
             
+            # Messages without text (e.g. AI tool-call turns) carry nothing to embed
+            skipped_count = len(messages_to_index)
+            messages_to_index = [m for m in messages_to_index if isinstance(m["text"], str) and m["text"].strip()]
+            skipped_count -= len(messages_to_index)
+            
+            # Drop messages indexed by an earlier session before spending embedding calls on them
+            existing_ids = _existing_message_ids(es_client, es_index_name, [m["message_id"] for m in messages_to_index])
+            if existing_ids:
+                messages_to_index = [m for m in messages_to_index if m["message_id"] not in existing_ids]
+                skipped_count += len(existing_ids)
+            
+            if not messages_to_index:
+                if console:
+                    console.print(f"\n[green]✅ Nothing new to index (skipped {skipped_count} duplicate/empty messages)[/green]")
+                return
+            
             # Generate embeddings and index documents
             if console:
                 console.print("[yellow]🔄 Generating embeddings and indexing to Elasticsearch...[/yellow]")
             
+            # parallel_bulk yields one result per action in submission order (ordered imap,
+            # raise_on_error=False), so failures are matched to their message ID by position
+            submitted_ids = deque()
+            
+            def actions():
+                # Embed lazily in provider-sized batches (one request per batch, not per message)
+                for start in range(0, len(messages_to_index), EMBEDDING_BATCH_SIZE):
+                    batch = messages_to_index[start:start + EMBEDDING_BATCH_SIZE]
+                    vectors = embeddings.embed_documents([m["text"] for m in batch])
+                    for message_data, embedding in zip(batch, vectors):
+                        submitted_ids.append(message_data["message_id"])
+                        yield {
+                            # Append-only with auto-generated IDs: Lucene skips the per-document
+                            # version lookup that explicit IDs require (duplicates were filtered above)
+                            "_op_type": "index",
+                            "_index": es_index_name,
+                            "_source": {
+                                **message_data,
+                                "vector": encode_vector(embedding),
+                                "is_summary": False
+                            }
+                        }
+            
+            # Large loads run with refresh/replication relaxed; small ones are not worth two settings updates
+            tuning = (
+                _bulk_tuning(es_client, es_index_name, console)
+                if len(messages_to_index) >= BULK_TUNING_MIN_DOCS else nullcontext()
+            )
             indexed_count = 0
-            skipped_count = 0
             error_count = 0
-            
-            for message_data in messages_to_index:
-                try:
-                    # Generate embedding for the text
-                    embedding = embeddings.embed_query(message_data["text"])
-                    
-                    # Add vector to document
-                    document = {
-                        **message_data,
-                        "vector": embedding,
-                        "is_summary": False
-                    }
-                    
-                    # Index document (using message_id as document ID to avoid duplicates)
-                    doc_id = f"{thread_id}_{message_data['message_id']}"
-                    
-                    # Check if document already exists
-                    if es_client.exists(index=es_index_name, id=doc_id):
-                        skipped_count += 1
+            with tuning:
+                # Send bulk requests from a thread pool while the generator embeds the next batch
+                for ok, item in parallel_bulk(
+                    # Auto-generated IDs are not idempotent: a transport retry after a timeout
+                    # would index the whole chunk a second time, so bulk requests never retry
+                    es_client.options(request_timeout=BULK_REQUEST_TIMEOUT, retry_on_timeout=False, max_retries=0),
+                    actions(),
+                    thread_count=thread_count,
+                    queue_size=BULK_QUEUE_SIZE,
+                    chunk_size=chunk_size,
+                    max_chunk_bytes=max_chunk_bytes,
+                    raise_on_error=False
+                ):
+                    message_id = submitted_ids.popleft()
+                    if ok:
+                        indexed_count += 1
                         continue
-                    
-                    es_client.index(
-                        index=es_index_name,
-                        id=doc_id,
-                        document=document
-                    )
-                    indexed_count += 1
-                    
-                except Exception as e:
                     error_count += 1
-                    if console:
-                        console.print(f"[red]❌ Error indexing message {message_data.get('message_id', 'unknown')}: {e}[/red]")
-                    continue
+                    # Per-item failures go through logging (lazy %-formatting), not Rich markup
+                    log.error("Error indexing message %s: %s", message_id, item.get("index", {}).get("error"))
+            
+            if indexed_count:
+                clear_retrieval_cache()
             
             # Summary
             if console:
                 console.print(f"\n[green]✅ Indexing complete![/green]")
-                console.print(f"[blue]📊 Indexed: {indexed_count} | Skipped (duplicates): {skipped_count} | Errors: {error_count}[/blue]")
+                console.print(f"[blue]📊 Indexed: {indexed_count} | Skipped (duplicates/empty): {skipped_count} | Errors: {error_count}[/blue]")
                 console.print(f"[blue]📊 Index: {es_index_name}[/blue]")
         
     except Exception as e:
@@ -3,23 +3,118 @@
 from typing import List, Dict, Any, Tuple, Optional
 from elasticsearch import Elasticsearch
 from rich.console import Console
-from ..processing.context_pruning import prune_with_provence
+from ..processing.context_pruning import prune_with_provence_batch
 from ..processing.context_summarization import summarize_context
-from ..processing.relevance_check import check_context_relevance
+from ..config.constants import (
+    RETRIEVAL_CACHE_SIZE,
+    SUMMARY_MIN_CHARS,
+    SCORE_GAP_RATIO,
+    MIN_RETRIEVED_DOCS
+)
+from ..utils.cache import LRUCache
+from .vector_encoding import encode_vector
 
+# Raw kNN hits keyed by (index, query, k, rank_window). Lets the memory tool reuse
+# the per-turn retrieval's search for the same question instead of re-querying.
+_retrieval_cache = LRUCache(maxsize=RETRIEVAL_CACHE_SIZE)
 
-def retrieve_from_elasticsearch(
+
+def _trim_at_score_gap(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Cut score-ordered hits at the first large drop in score (elbow detection),
+    so clearly weaker neighbours are not pruned and summarized.
+    
+    Args:
+        hits: Raw hits from the Elasticsearch response, highest score first
+        
+    Returns:
+        Leading hits up to the first gap larger than SCORE_GAP_RATIO of the top
+        score, never fewer than MIN_RETRIEVED_DOCS
+    """
+    if len(hits) <= MIN_RETRIEVED_DOCS:
+        return hits
+    
+    max_gap = SCORE_GAP_RATIO * hits[0]["_score"]
+    for i in range(1, len(hits)):
+        if hits[i - 1]["_score"] - hits[i]["_score"] > max_gap:
+            return hits[:max(i, MIN_RETRIEVED_DOCS)]
+    return hits
+
+
+def _format_hits(
+    query: str,
+    hits: List[Dict[str, Any]],
+    rank_window: int,
+    verbose: bool = False,
+    console: Optional[Console] = None
+) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Convert raw Elasticsearch hits into retrieved documents and a context string.
+    
+    Args:
+        query: Search query the hits belong to
+        hits: Raw hits from the Elasticsearch response
+        rank_window: Number of candidates the hits were ranked from
+        verbose: Whether to show verbose output
+        console: Rich console for output
+        
+    Returns:
+        Tuple of (retrieved_documents, formatted_context_string)
+    """
+    # Extract documents with scores
+    retrieved_docs = []
+    for hit in hits:
+        source = hit.get("_source", {})
+        fields = hit.get("fields", {})
+        score = hit["_score"]
+        retrieved_docs.append({
+            "content": source.get("text", source.get("content", "")),
+            # Metadata comes from doc values; _source is the fallback for older cached hits
+            "message_type": fields.get("message_type", [source.get("message_type", "unknown")])[0],
+            "timestamp": fields.get("timestamp", [source.get("timestamp", "unknown")])[0],
+            "thread_id": fields.get("thread_id", [source.get("thread_id", "unknown")])[0],
+            "score": score
+        })
+    
+    # Format context string
+    context_string = "\n\n".join([doc["content"] for doc in retrieved_docs])
+    
+    # Verbose display
+    if verbose and console:
+        console.print(f"\n[bold yellow]🔍 RETRIEVAL ANALYSIS[/bold yellow]")
+        console.print("="*80)
+        console.print(f"[blue]Query:[/blue] {query}")
+        console.print(f"[blue]Retrieved:[/blue] {len(retrieved_docs)} documents (from {rank_window} candidates)")
+        console.print(f"[blue]Total context length:[/blue] {len(context_string)} characters\n")
+        
+        for i, doc in enumerate(retrieved_docs, 1):
+            console.print(f"[cyan]📄 Document {i} | Score: {doc['score']:.4f} | Type: {doc['message_type']}[/cyan]")
+            console.print(f"[cyan]   Timestamp: {doc['timestamp']} | Thread: {doc['thread_id']}[/cyan]")
+            content_preview = doc['content'][:200] + "..." if len(doc['content']) > 200 else doc['content']
+            console.print(f"[cyan]   Content: {content_preview}[/cyan]")
+            console.print("-" * 80)
+    
+    return retrieved_docs, context_string
+
+
+def clear_retrieval_cache() -> None:
+    """Forget memoized search hits (call after the index contents change)."""
+    _retrieval_cache.clear()
+
+
+def _search_raw(
     query: str,
     es_client: Optional[Elasticsearch],
     es_index_name: Optional[str],
     embeddings,
     rank_window: int,
     k: int = 5,
-    verbose: bool = False,
-    console: Optional[Console] = None
-) -> Tuple[List[Dict[str, Any]], str]:
+    precomputed_vector: Optional[List[float]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
     """
-    Retrieve context from Elasticsearch with score-based ranking
+    Run the kNN search for one query and return the raw, score-ordered hits
+    (no per-document formatting). Hits for a recently searched query are reused
+    without another round-trip.
     
     Args:
         query: Search query
@@ -28,194 +123,223 @@ def retrieve_from_elasticsearch(
         embeddings: Embeddings model instance
         rank_window: Number of candidates to retrieve before ranking
         k: Number of results to return
-        verbose: Whether to show verbose output
-        console: Rich console for output
+        precomputed_vector: Optional query embedding (skips embedding the query again)
         
     Returns:
-        Tuple of (retrieved_documents, formatted_context_string)
+        Tuple of (hits, message); message is None when hits were found, otherwise
+        it explains why the list is empty
     """
     if not es_client or not es_index_name:
         return [], "Elasticsearch is not available. Cannot search long-term memory."
     
     try:
-        # Check if index exists and has documents
-        if not es_client.indices.exists(index=es_index_name):
-            return [], "No previous conversations stored in long-term memory yet."
+        # Reuse hits from a recent identical search; a cache hit needs no round-trip
+        cache_key = (es_index_name, query, k, rank_window)
+        hits = _retrieval_cache.get(cache_key)
         
-        # Get document count
-        try:
-            doc_count = es_client.count(index=es_index_name)["count"]
-            if doc_count == 0:
-                return [], "Long-term memory is empty. No previous conversations to search."
-        except Exception as e:
-            return [], f"Error checking memory: {str(e)}"
-        
-        # Generate embedding for the query
-        try:
-            query_embedding = embeddings.embed_query(query)
-        except Exception as e:
-            return [], f"Error generating embedding: {str(e)}"
-        
-        # Perform semantic search using kNN with rank_window
-        try:
-            search_body = {
-                "knn": {
-                    "field": "vector",
-                    "query_vector": query_embedding,
-                    "k": k,
-                    "num_candidates": rank_window  # Retrieve more candidates, then rank top k
-                },
-                "_source": ["text", "content", "message_type", "timestamp", "thread_id"],
-                "size": k
-            }
-            
-            response = es_client.search(index=es_index_name, body=search_body)
-            
-            if not response.get("hits") or len(response["hits"]["hits"]) == 0:
-                return [], "No relevant previous conversations found in long-term memory."
+        if hits is None:
+            # Check if index exists and has documents
+            if not es_client.indices.exists(index=es_index_name):
+                return [], "No previous conversations stored in long-term memory yet."
             
-            # Extract documents with scores
-            retrieved_docs = []
-            for hit in response["hits"]["hits"]:
-                source = hit["_source"]
-                score = hit["_score"]
-                retrieved_docs.append({
-                    "content": source.get("content", source.get("text", "")),
-                    "message_type": source.get("message_type", "unknown"),
-                    "timestamp": source.get("timestamp", "unknown"),
-                    "thread_id": source.get("thread_id", "unknown"),
-                    "score": score
-                })
+            # Get document count
+            try:
+                doc_count = es_client.count(index=es_index_name)["count"]
+                if doc_count == 0:
+                    return [], "Long-term memory is empty. No previous conversations to search."
+            except Exception as e:
+                return [], f"Error checking memory: {str(e)}"
             
-            # Format context string
-            context_parts = []
-            for i, doc in enumerate(retrieved_docs, 1):
-                context_parts.append(doc["content"])
+            # Use the precomputed embedding when given
+            query_embedding = precomputed_vector
+            if query_embedding is None:
+                try:
+                    query_embedding = embeddings.embed_query(query)
+                except Exception as e:
+                    return [], f"Error generating embedding: {str(e)}"
             
-            context_string = "\n\n".join(context_parts)
+            # Perform semantic search using kNN with rank_window
+            try:
+                response = es_client.search(
+                    index=es_index_name,
+                    knn={
+                        "field": "vector",
+                        "query_vector": encode_vector(query_embedding),
+                        "k": k,
+                        "num_candidates": rank_window  # Retrieve more candidates, then rank top k
+                    },
+                    # Only the text is read from _source (never the dense vector);
+                    # metadata is served from columnar doc values
+                    source={
+                        "includes": ["text"],
+                        "excludes": ["vector"]
+                    },
+                    docvalue_fields=[
+                        "message_type",
+                        "thread_id",
+                        {"field": "timestamp", "format": "strict_date_optional_time"}
+                    ],
+                    size=k,
+                    # Scores come from the hits themselves; skip counting total matches
+                    track_total_hits=False
+                )
+            except Exception as e:
+                return [], f"Error searching memory: {str(e)}"
             
-            # Verbose display
-            if verbose and console:
-                console.print(f"\n[bold yellow]🔍 RETRIEVAL ANALYSIS[/bold yellow]")
-                console.print("="*80)
-                console.print(f"[blue]Query:[/blue] {query}")
-                console.print(f"[blue]Retrieved:[/blue] {len(retrieved_docs)} documents (from {rank_window} candidates)")
-                console.print(f"[blue]Total context length:[/blue] {len(context_string)} characters\n")
-                
-                for i, doc in enumerate(retrieved_docs, 1):
-                    console.print(f"[cyan]📄 Document {i} | Score: {doc['score']:.4f} | Type: {doc['message_type']}[/cyan]")
-                    console.print(f"[cyan]   Timestamp: {doc['timestamp']} | Thread: {doc['thread_id']}[/cyan]")
-                    content_preview = doc['content'][:200] + "..." if len(doc['content']) > 200 else doc['content']
-                    console.print(f"[cyan]   Content: {content_preview}[/cyan]")
-                    console.print("-" * 80)
-            
-            return retrieved_docs, context_string
-            
-        except Exception as e:
-            return [], f"Error searching memory: {str(e)}"
+            hits = _trim_at_score_gap(response["hits"]["hits"])
+            _retrieval_cache.put(cache_key, hits)
+        
+        if not hits:
+            return [], "No relevant previous conversations found in long-term memory."
+        return hits, None
             
     except Exception as e:
         return [], f"Error accessing long-term memory: {str(e)}"
 
 
-def check_elasticsearch_with_confidence(
+def retrieve_from_elasticsearch(
     query: str,
     es_client: Optional[Elasticsearch],
     es_index_name: Optional[str],
     embeddings,
+    rank_window: int,
+    k: int = 5,
+    verbose: bool = False,
+    console: Optional[Console] = None,
+    precomputed_vector: Optional[List[float]] = None
+) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Retrieve context from Elasticsearch with score-based ranking
+    
+    Args:
+        query: Search query
+        es_client: Elasticsearch client instance
+        es_index_name: Name of the Elasticsearch index
+        embeddings: Embeddings model instance
+        rank_window: Number of candidates to retrieve before ranking
+        k: Number of results to return
+        verbose: Whether to show verbose output
+        console: Rich console for output
+        precomputed_vector: Optional query embedding (skips embedding the query again)
+        
+    Returns:
+        Tuple of (retrieved_documents, formatted_context_string)
+    """
+    hits, message = _search_raw(
+        query, es_client, es_index_name, embeddings, rank_window,
+        k=k, precomputed_vector=precomputed_vector
+    )
+    if not hits:
+        return [], message
+    return _format_hits(query, hits, rank_window, verbose, console)
+
+
+def process_retrieved_context(
+    query: str,
+    retrieved_docs: List[Dict[str, Any]],
+    context_string: str,
     llm,
     provence_model: Optional[Any],
     args,
     console: Optional[Console] = None
-) -> Tuple[bool, str, float]:
+) -> str:
     """
-    Check Elasticsearch for relevant context and return confidence score.
-    Now includes LLM-based relevance checking to ensure context actually answers the query.
+    Prune retrieved documents with Provence and summarize the result.
+    Shared by the confidence check and the long-term memory tool, so both produce
+    (and cache) the same context for the same query.
     
     Args:
         query: User's query
-        es_client: Elasticsearch client instance
-        es_index_name: Name of the Elasticsearch index
-        embeddings: Embeddings model instance
-        llm: LLM instance for relevance checking
+        retrieved_docs: Documents returned by retrieve_from_elasticsearch
+        context_string: Retrieved documents joined into one context string
+        llm: LLM instance for summarization
         provence_model: Provence reranker model (optional)
         args: Parsed command line arguments
         console: Rich console for output
         
     Returns:
-        Tuple of (has_results, context_or_message, max_score)
-        - has_results: True if Elasticsearch has relevant results that actually answer the query
-        - context_or_message: Pruned and summarized context, or error message
-        - max_score: Maximum similarity score from Elasticsearch (0.0 if no results)
+        Pruned and (if long enough) summarized context
     """
-    if not es_client or not es_index_name:
-        return False, "Elasticsearch is not available.", 0.0
+    original_context = context_string
     
-    try:
-        # Retrieve context from Elasticsearch
-        retrieved_docs, context_string = retrieve_from_elasticsearch(
-            query, es_client, es_index_name, embeddings, args.rank_window,
-            k=5, verbose=args.verbose, console=console
-        )
-        
-        if not retrieved_docs:
-            return False, context_string, 0.0  # No results or error
-        
-        # Get maximum score from retrieved documents
-        max_score = max(doc["score"] for doc in retrieved_docs) if retrieved_docs else 0.0
-        
-        # Check similarity score threshold first
-        if max_score < args.confidence_threshold:
-            if args.verbose and console:
-                console.print(f"[yellow]⚠️  Elasticsearch similarity score ({max_score:.4f}) below threshold ({args.confidence_threshold}). Will use Tavily.[/yellow]")
-            return False, f"Elasticsearch similarity score ({max_score:.4f}) below threshold ({args.confidence_threshold})", max_score
-        
-        # Similarity score is good, now process context
-        original_context = context_string
-        
+    if args.verbose and console:
+        console.print(f"[yellow]📦 Original retrieved context: {len(original_context)} characters[/yellow]")
+    
+    # Step 1: Prune context using Provence (if available)
+    if provence_model:
         if args.verbose and console:
-            console.print(f"[green]✅ Elasticsearch similarity score ({max_score:.4f}) meets threshold ({args.confidence_threshold})[/green]")
-            console.print(f"[yellow]📦 Original retrieved context: {len(original_context)} characters[/yellow]")
-        
-        # Step 1: Prune context using Provence (if available)
-        if provence_model:
-            if args.verbose and console:
-                console.print(f"[yellow]📝 Pruning context with Provence reranker...[/yellow]")
-            pruned_context = prune_with_provence(query, original_context, provence_model, args.pruning_threshold, args.verbose, console)
-        else:
-            pruned_context = original_context
-        
-        # Step 2: Summarize context to reduce duplication
+            console.print(f"[yellow]📝 Pruning context with Provence reranker...[/yellow]")
+        pruned_docs = prune_with_provence_batch(
+            query, [doc["content"] for doc in retrieved_docs], provence_model,
+            args.pruning_threshold, args.verbose, console
+        )
+        pruned_context = "\n\n".join(pruned_docs)
+    else:
+        pruned_context = original_context
+    
+    # Step 2: Summarize context to reduce duplication (short contexts are used as-is)
+    if len(pruned_context) > SUMMARY_MIN_CHARS:
         if args.verbose and console:
             console.print(f"[yellow]📝 Summarizing context to reduce duplication...[/yellow]")
-        summarized_context = summarize_context(query, pruned_context, llm, args.verbose, console)
-        
-        # Step 3: Check actual relevance using LLM
-        if args.verbose and console:
-            console.print(f"[yellow]🔍 Checking if context actually answers the question...[/yellow]")
-        
-        is_relevant, relevance_score = check_context_relevance(query, summarized_context, llm, args.verbose, console)
-        
-        if not is_relevant:
-            if args.verbose and console:
-                console.print(f"[yellow]⚠️  Retrieved context is not actually relevant to the question (relevance score: {relevance_score:.2f}). Will use Tavily.[/yellow]")
-            return False, f"Retrieved context is not relevant to the question (relevance score: {relevance_score:.2f})", max_score
-        
-        # Both similarity and relevance checks passed
-        if args.verbose and console:
-            console.print(f"[green]✅ Context is relevant (relevance score: {relevance_score:.2f})[/green]")
-        
-        # Format final result
-        result = f"Found {len(retrieved_docs)} relevant previous conversation(s) (similarity: {max_score:.4f}, relevance: {relevance_score:.2f}):\n\n"
-        result += f"Context Summary:\n{summarized_context}"
-        
-        if args.verbose and console:
-            console.print(f"[green]✅ Final context ready: {len(summarized_context)} characters[/green]")
-        
-        return True, result, max_score
+        return summarize_context(query, pruned_context, llm, args.verbose, console)
+    
+    if args.verbose and console:
+        console.print(f"[cyan]📝 Skipping summarization: context is only {len(pruned_context)} characters (<= {SUMMARY_MIN_CHARS})[/cyan]")
+    return pruned_context
+
+
+def retrieve_and_process(
+    query: str,
+    es_client: Optional[Elasticsearch],
+    es_index_name: Optional[str],
+    embeddings,
+    llm,
+    provence_model: Optional[Any],
+    args,
+    console: Optional[Console] = None,
+    precomputed_vector: Optional[List[float]] = None
+) -> Tuple[str, float]:
+    """
+    Run retrieval, pruning and summarization once and format the long-term memory context.
+    
+    Args:
+        query: User's query
+        es_client: Elasticsearch client instance
+        es_index_name: Name of the Elasticsearch index
+        embeddings: Embeddings model instance
+        llm: LLM instance for summarization
+        provence_model: Provence reranker model (optional)
+        args: Parsed command line arguments
+        console: Rich console for output
+        precomputed_vector: Optional embedding of the query (skips embedding it again)
         
-    except Exception as e:
-        if args.verbose and console:
-            console.print(f"[red]❌ Error checking Elasticsearch: {e}[/red]")
-        return False, f"Error accessing long-term memory: {str(e)}", 0.0
+    Returns:
+        Tuple of (context_or_message, max_score)
+        - context_or_message: Formatted memory context, or a message if nothing was found
+        - max_score: Maximum similarity score from Elasticsearch (0.0 if no results)
+    """
+    # Retrieve context from Elasticsearch (use rank_window for candidates, return top 5)
+    hits, message = _search_raw(
+        query, es_client, es_index_name, embeddings, args.rank_window,
+        k=5, precomputed_vector=precomputed_vector
+    )
+    
+    if not hits:
+        return message, 0.0  # This will be an error message or empty message
+    
+    # Hits are sorted by score, so the first one carries the maximum
+    max_score = hits[0]["_score"]
+    retrieved_docs, context_string = _format_hits(query, hits, args.rank_window, args.verbose, console)
+    summarized_context = process_retrieved_context(
+        query, retrieved_docs, context_string, llm, provence_model, args, console
+    )
+    
+    # Format final result
+    result = f"Found {len(retrieved_docs)} relevant previous conversation(s) (retrieved from rank_window={args.rank_window} candidates):\n\n"
+    result += f"Context Summary:\n{summarized_context}"
+    
+    if args.verbose and console:
+        console.print(f"[green]✅ Final context ready: {len(summarized_context)} characters[/green]")
+    
+    return result, max_score
 
@@ -0,0 +1,34 @@
+"""Vector encoding for the Elasticsearch dense_vector field."""
+
+import math
+from array import array
+from typing import List, Sequence
+
+
+def encode_vector(vector: Sequence[float]) -> List[float]:
+    """
+    Encode an embedding for the `vector` field (similarity: dot_product).
+    
+    L2-normalizes the vector once on the client, so Elasticsearch can score with a
+    plain dot product instead of recomputing norms for every candidate (for unit
+    vectors dot product and cosine similarity are identical).
+    
+    Components are cast to float32 (what Elasticsearch stores) and then written with
+    9 significant digits, which round-trip any float32 exactly, while Python's float64
+    repr would spend up to 17 digits per component in the JSON request body. Casting
+    first avoids rounding twice (float64 -> 9 digits -> float32), which can land one
+    float32 ulp off.
+    
+    Args:
+        vector: Float embedding
+        
+    Returns:
+        Unit-length float components
+        
+    Raises:
+        ValueError: If the vector has zero length and cannot be normalized
+    """
+    norm = math.sqrt(math.fsum(x * x for x in vector))
+    if norm == 0.0:
+        raise ValueError("Cannot normalize a zero-length embedding for dot_product similarity")
+    return [float(f"{x:.9g}") for x in array("f", [x / norm for x in vector])]
@@ -1,7 +1,7 @@
 """Utils module for Elasticsearch Agent."""
 
-from .checkpoints import process_checkpoints
-from .display import process_chunks, setup_console
-
-__all__ = ["process_checkpoints", "process_chunks", "setup_console"]
+from .cache import LRUCache, hash_key
+from .checkpoints import process_checkpoints, trim_thread_messages
+from .display import process_chunks, setup_console, setup_logging
 
+__all__ = ["LRUCache", "hash_key", "process_checkpoints", "trim_thread_messages", "process_chunks", "setup_console", "setup_logging"]
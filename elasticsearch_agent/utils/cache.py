@@ -0,0 +1,63 @@
+"""Caching utilities for Elasticsearch Agent."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+def hash_key(*parts: Any) -> bytes:
+    """
+    Build a compact, fixed-size cache key from arbitrary parts.
+
+    Args:
+        *parts: Values identifying the cached computation (query, context, threshold, ...)
+
+    Returns:
+        16-byte BLAKE2b digest of the parts
+    """
+    payload = "\x00".join(str(part) for part in parts).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+class LRUCache:
+    """
+    Thread-safe, bounded least-recently-used cache backed by an OrderedDict.
+
+    Args:
+        maxsize: Maximum number of entries kept before the oldest is evicted
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the cached value for key (marking it recently used), or default."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry if full."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -1,41 +1,105 @@
 """Checkpoint processing utilities for Elasticsearch Agent."""
 
-from langchain_core.messages import HumanMessage, AIMessage
+from itertools import islice
+from operator import itemgetter
+from typing import Optional
+from langchain_core.messages import HumanMessage, AIMessage, RemoveMessage
 from rich.console import Console
+from rich.style import Style
+from rich.text import Text
 
+# Pre-styled message line templates keyed by exact message type, copied per message
+# instead of re-parsing markup; subclasses (e.g. AIMessageChunk) fall back to isinstance
+_ROLE = {
+    HumanMessage: Text("User: ", style="bright_magenta"),
+    AIMessage: Text("Agent: ", style="bright_magenta"),
+}
+_ID_STYLE = Style(color="bright_cyan")
+_TS_AND_ID = itemgetter("ts", "id")
+_SEPARATOR = "=" * 58
 
-def process_checkpoints(checkpoints, console: Console):
+
+def process_checkpoints(checkpoints, console: Console, limit: Optional[int] = None):
     """
-    Processes a list of checkpoints and displays relevant information.
+    Processes checkpoints and displays relevant information.
     
     Args:
-        checkpoints: List of checkpoint tuples
+        checkpoints: Iterable of checkpoint tuples (consumed lazily)
         console: Rich console for output
+        limit: Maximum number of checkpoints to display (None for all)
     """
-    console.print("\n==========================================================\n")
-
-    for idx, checkpoint_tuple in enumerate(checkpoints):
+    blocks = []
+    for checkpoint_tuple in islice(checkpoints, limit):
         # Extract key information about the checkpoint
         checkpoint = checkpoint_tuple.checkpoint
-        messages = checkpoint["channel_values"].get("messages", [])
+        timestamp, checkpoint_id = _TS_AND_ID(checkpoint)
+        messages = checkpoint["channel_values"].get("messages") or ()
 
-        # Display checkpoint information
-        console.print(f"[white]Checkpoint:[/white]")
-        console.print(f"[black]Timestamp: {checkpoint['ts']}[/black]")
-        console.print(f"[black]Checkpoint ID: {checkpoint['id']}[/black]")
+        # Buffer the checkpoint's lines into one block; the header is one Text
+        # with style spans instead of parsed markup
+        header = Text()
+        header.append("Checkpoint:\n", style="white")
+        header.append(f"Timestamp: {timestamp}\n", style="black")
+        header.append(f"Checkpoint ID: {checkpoint_id}", style="black")
+        lines = [header]
 
-        # Display checkpoint messages
+        # Display checkpoint messages (styled Text, so message content is never parsed as markup)
         for message in messages:
-            if isinstance(message, HumanMessage):
-                console.print(
-                    f"[bright_magenta]User: {message.content}[/bright_magenta] [bright_cyan](Message ID: {message.id})[/bright_cyan]"
-                )
-            elif isinstance(message, AIMessage):
-                console.print(
-                    f"[bright_magenta]Agent: {message.content}[/bright_magenta] [bright_cyan](Message ID: {message.id})[/bright_cyan]"
-                )
+            prefix = _ROLE.get(type(message))
+            if prefix is None:
+                prefix = next((value for cls, value in _ROLE.items() if isinstance(message, cls)), None)
+                if prefix is None:
+                    continue
+            line = prefix.copy()
+            line.append(str(message.content), style="bright_magenta")
+            line.append(" ")
+            line.append(f"(Message ID: {message.id})", style=_ID_STYLE)
+            lines.append(line)
+
+        lines.append(Text(""))
+        blocks.append(Text("\n").join(lines))
 
-        console.print("")
+    if console.is_terminal:
+        # Render everything into a capture buffer and write it to the terminal in one go
+        with console.capture() as capture:
+            console.print(f"\n{_SEPARATOR}\n")
+            for block in blocks:
+                console.print(block)
+            console.print(_SEPARATOR)
+        output = capture.get()
+    else:
+        # Piped or redirected: styles would be stripped anyway, so skip Rich rendering
+        output = "".join([f"\n{_SEPARATOR}\n\n", *(f"{block.plain}\n" for block in blocks), f"{_SEPARATOR}\n"])
 
-    console.print("==========================================================")
+    console.file.write(output)
+    console.file.flush()
 
+
+
+def trim_thread_messages(agent, config, max_messages: int) -> int:
+    """
+    Keep only the most recent messages in the agent's checkpointed thread state,
+    so each turn replays a bounded history through the graph.
+    The cut is placed at the start of a user turn so tool calls stay paired with their results.
+    
+    Args:
+        agent: LangGraph agent with a checkpointer
+        config: Runnable config identifying the thread
+        max_messages: Number of trailing messages to keep (approximately, see cut rule)
+        
+    Returns:
+        Number of messages removed
+    """
+    messages = agent.get_state(config).values.get("messages", [])
+    if len(messages) <= max_messages:
+        return 0
+    
+    # First user turn inside the window, or the last one before it if none starts there
+    start = len(messages) - max_messages
+    turn_starts = [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+    cut = next((i for i in turn_starts if i >= start), turn_starts[-1] if turn_starts else 0)
+    if cut == 0:
+        return 0
+    
+    agent.update_state(config, {"messages": [RemoveMessage(id=message.id) for message in messages[:cut]]})
+    return cut
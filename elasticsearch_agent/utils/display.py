@@ -1,16 +1,102 @@
 """Display utilities for Elasticsearch Agent."""
 
+import ast
+import logging
 from rich.console import Console
+from rich.logging import RichHandler
+from rich.text import Text
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # Optional speed-up; fall back to stdlib json
+    from json import loads as _json_loads
+
+
+# Tool-call message templates, parsed once at import
+_HIGHLIGHT = "on deep_sky_blue1"
+_LTM_PREFIX = Text.from_markup(
+    "\n🧠 The agent is searching [on deep_sky_blue1]long-term memory (Elasticsearch)[/on deep_sky_blue1] for: "
+)
+_TOOL_PREFIX = Text("\nThe agent is calling the tool ")
+_WAIT_SUFFIX = Text.from_markup(". Please wait for the agent's answer[deep_sky_blue1]...[/deep_sky_blue1]")
+
+
+def _format_memory_search(tool_name: str, tool_arguments: dict) -> Text:
+    """Format a long-term memory search notice."""
+    line = _LTM_PREFIX.copy()
+    line.append(str(tool_arguments.get("query", "")), style=_HIGHLIGHT)
+    line.append("...")
+    return line
+
+
+def _format_tool_call(tool_name: str, tool_arguments: dict) -> Text:
+    """Format a generic tool-call notice, including the query when there is one."""
+    line = _TOOL_PREFIX.copy()
+    line.append(tool_name, style=_HIGHLIGHT)
+    if "query" in tool_arguments:
+        line.append(" with the query ")
+        line.append(str(tool_arguments["query"]), style=_HIGHLIGHT)
+        line.append(_WAIT_SUFFIX)
+    else:
+        line.append("...")
+    return line
+
+
+# Tool name -> formatter; tools not listed use _format_tool_call
+_TOOL_FORMATTERS = {"search_long_term_memory": _format_memory_search}
+
+
+def _parse_tool_arguments(arguments) -> dict:
+    """
+    Parse tool-call arguments without eval.
+    
+    Args:
+        arguments: JSON string from the model (some providers pass a dict already)
+        
+    Returns:
+        Parsed arguments; Python-literal payloads (True/None, single quotes) go through
+        ast.literal_eval, and anything unparseable yields an empty dict so a display
+        notice can never break the chat loop
+    """
+    if not isinstance(arguments, str):
+        parsed = arguments
+    else:
+        try:
+            parsed = _json_loads(arguments)
+        except ValueError:  # orjson.JSONDecodeError subclasses ValueError too
+            try:
+                parsed = ast.literal_eval(arguments)
+            except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+                parsed = None
+    return parsed if isinstance(parsed, dict) else {}
 
 
 def setup_console() -> Console:
     """
     Set up Rich console for output formatting.
+    Automatic highlighting and emoji-code replacement are off (output uses literal
+    emoji and explicit styles), which saves a regex pass on every print.
     
     Returns:
         Rich Console instance
     """
-    return Console()
+    return Console(highlight=False, emoji=False, log_time=False)
+
+
+def setup_logging(console: Console, level: int = logging.INFO) -> None:
+    """
+    Route the agent's "es_agent" loggers through a RichHandler on the given console.
+    Safe to call more than once; the handler is only attached the first time.
+    
+    Args:
+        console: Rich console the log records are rendered on
+        level: Minimum level to emit
+    """
+    logger = logging.getLogger("es_agent")
+    logger.setLevel(level)
+    if not any(isinstance(handler, RichHandler) for handler in logger.handlers):
+        logger.addHandler(RichHandler(console=console, show_path=False, markup=False))
+    logger.propagate = False
 
 
 def process_chunks(chunk, console: Console):
@@ -21,43 +107,37 @@ def process_chunks(chunk, console: Console):
         chunk: Chunk from agent stream
         console: Rich console for output
     """
-    # Check if the chunk contains an agent's message
-    if "agent" in chunk:
-        # Iterate over the messages in the chunk
-        for message in chunk["agent"]["messages"]:
-            # Check if the message contains tool calls
-            if "tool_calls" in message.additional_kwargs:
-                # Extract all the tool calls
-                tool_calls = message.additional_kwargs["tool_calls"]
-
-                # Iterate over the tool calls
-                for tool_call in tool_calls:
-                    # Extract the tool name
-                    tool_name = tool_call["function"]["name"]
-
-                    # Extract the tool arguments
-                    tool_arguments = eval(tool_call["function"]["arguments"])
-                    
-                    # Handle different tool argument structures
-                    if tool_name == "search_long_term_memory":
-                        tool_query = tool_arguments.get("query", "")
-                        console.print(
-                            f"\n🧠 The agent is searching [on deep_sky_blue1]long-term memory (Elasticsearch)[/on deep_sky_blue1] for: [on deep_sky_blue1]{tool_query}[/on deep_sky_blue1]...",
-                            style="deep_sky_blue1",
-                        )
-                    elif "query" in tool_arguments:
-                        tool_query = tool_arguments["query"]
-                        console.print(
-                            f"\nThe agent is calling the tool [on deep_sky_blue1]{tool_name}[/on deep_sky_blue1] with the query [on deep_sky_blue1]{tool_query}[/on deep_sky_blue1]. Please wait for the agent's answer[deep_sky_blue1]...[/deep_sky_blue1]",
-                            style="deep_sky_blue1",
-                        )
-                    else:
-                        console.print(
-                            f"\nThe agent is calling the tool [on deep_sky_blue1]{tool_name}[/on deep_sky_blue1]...",
-                            style="deep_sky_blue1",
-                        )
-            else:
-                # If the message doesn't contain tool calls, extract and display the agent's answer
-                agent_answer = message.content
-                console.print(f"\nAgent:\n{agent_answer}", style="black on white")
+    # Only chunks from the agent node carry messages to display
+    agent = chunk.get("agent")
+    if agent is None:
+        return
 
+    # Output that is not a terminal gets plain text, skipping Rich rendering entirely
+    plain = not console.is_terminal
+
+    # Iterate over the messages in the chunk
+    for message in agent["messages"]:
+        # Check if the message contains tool calls
+        tool_calls = (getattr(message, "additional_kwargs", None) or {}).get("tool_calls")
+        if tool_calls is not None:
+            # Iterate over the tool calls
+            for tool_call in tool_calls:
+                # Extract the tool name
+                tool_name = tool_call["function"]["name"]
+
+                # Extract the tool arguments
+                tool_arguments = _parse_tool_arguments(tool_call["function"]["arguments"])
+                
+                # Format with the tool's dedicated formatter, or the generic one
+                line = _TOOL_FORMATTERS.get(tool_name, _format_tool_call)(tool_name, tool_arguments)
+                if plain:
+                    console.file.write(f"{line.plain}\n")
+                else:
+                    console.print(line, style="deep_sky_blue1")
+        else:
+            # If the message doesn't contain tool calls, extract and display the agent's answer
+            # LLM text is printed verbatim: no markup parsing or highlighting
+            if plain:
+                console.file.write(f"\nAgent:\n{message.content}\n")
+            else:
+                console.print(f"\nAgent:\n{message.content}", style="black on white", markup=False, highlight=False)